@@ -8,12 +8,20 @@ and data analysis tasks that require Python's scientific libraries.
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, BinaryIO
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
 import pandas as pd
 import numpy as np
-from io import BytesIO
+import asyncio
+import hashlib
 import json
+import re
+import shutil
 import tempfile
+import time
 import os
 
 app = FastAPI(
@@ -31,6 +39,309 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Use pyarrow's multithreaded CSV parser when available (set FAST_IO=0 to disable)
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+FAST_IO = os.getenv("FAST_IO", "1") != "0"
+
+# Downcast parsed numeric columns to float32 / smaller ints (set SHRINK_DTYPES=1 to enable)
+SHRINK_DTYPES = os.getenv("SHRINK_DTYPES", "0") == "1"
+STATS_DTYPE = np.float32 if SHRINK_DTYPES else np.float64
+
+# Uploads are copied to disk in chunks
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Data files are parsed in worker processes so large SPSS/Stata files
+# don't block the event loop
+PROCESS_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+# Parsed frames keyed by (content hash, extension), least recently used first
+FRAME_CACHE_SIZE = 8
+_frame_cache: "OrderedDict[tuple[str, str], pd.DataFrame]" = OrderedDict()
+
+
+# Parsed frames are also saved as Feather files so evicted or restarted
+# sessions reload them instead of re-parsing slow formats (needs pyarrow)
+FEATHER_CACHE_DIR = os.getenv(
+    "FEATHER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "scholarly-ideas-frames")
+)
+FEATHER_CACHE_SIZE = 64
+# Seconds after its last write that a partial "*.feather.<pid>.tmp" file counts as abandoned
+FEATHER_TMP_MAX_AGE = 3600
+
+
+def private_cache_dir(path: str) -> bool:
+    """
+    Create a cache directory only the current user can access. Returns False
+    when it can't be created or an existing one is shared, e.g. pre-created
+    by another user of the temp dir, so cached frames can't be planted.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.stat(path)
+        if os.name == "posix":
+            if st.st_uid != os.getuid() or st.st_mode & 0o022:
+                print(f"Feather cache disabled: {path} is not private to this user")
+                return False
+            os.chmod(path, 0o700)
+    except OSError as e:
+        print(f"Feather cache disabled: {e}")
+        return False
+    return True
+
+
+FEATHER_CACHE_ENABLED = HAS_PYARROW and private_cache_dir(FEATHER_CACHE_DIR)
+
+# Datasets returned by /ingest are named by their frame cache key, "<content hash>.<extension>",
+# and kept in their own LRU so plain uploads filling the frame cache can't evict them
+DATASET_ID_RE = re.compile(r"([0-9a-f]{32})\.(\w+)")
+DATASET_CACHE_SIZE = 16
+_datasets: "OrderedDict[tuple[str, str], pd.DataFrame]" = OrderedDict()
+
+
+def cache_put(cache: OrderedDict, key, value, max_size: int) -> None:
+    """Insert into an LRU OrderedDict, evicting the least recently used entry."""
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+async def run_in_process_pool(func, *args):
+    """
+    Run func in PROCESS_POOL. A worker that dies (e.g. OOM-killed on a huge
+    file) breaks the whole pool, so it is replaced and the call retried once.
+    """
+    global PROCESS_POOL
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = PROCESS_POOL
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            print("Parser worker process died, restarting the process pool")
+            if PROCESS_POOL is pool:
+                PROCESS_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+                pool.shutdown(wait=False)
+
+    raise HTTPException(
+        status_code=503,
+        detail="The file parser crashed, possibly running out of memory. Please try again or use a smaller file.",
+    )
+
+
+async def spool_upload(file: UploadFile, digest=None) -> tempfile.NamedTemporaryFile:
+    """Copy an upload into a named temp file without buffering it all in memory."""
+    spool = tempfile.NamedTemporaryFile()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if digest is not None:
+            digest.update(chunk)
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+async def read_upload(file: UploadFile, extension: str) -> pd.DataFrame:
+    """
+    Parse an uploaded data file, reusing the cached frame when the same
+    content was parsed recently. Callers must not modify the returned frame.
+    """
+    _, df = await ingest_upload(file, extension)
+    return df
+
+
+async def ingest_upload(file: UploadFile, extension: str) -> tuple[str, pd.DataFrame]:
+    """Parse an uploaded data file like read_upload, also returning its dataset id."""
+    digest = hashlib.blake2b(digest_size=16)
+    with await spool_upload(file, digest) as spool:
+        key = (digest.hexdigest(), extension)
+        if key in _frame_cache:
+            _frame_cache.move_to_end(key)
+            return ".".join(key), _frame_cache[key]
+
+        loop = asyncio.get_running_loop()
+        cached_path = feather_cache_path(*key)
+        df = None
+        if cached_path and os.path.exists(cached_path):
+            try:
+                os.utime(cached_path)
+                df = await loop.run_in_executor(None, read_feather, cached_path)
+            except FileNotFoundError:
+                pass  # pruned by a concurrent request
+        if df is None:
+            df = await run_in_process_pool(parse_data_path, spool.name, extension, cached_path)
+            if cached_path:
+                prune_feather_cache()
+
+    cache_put(_frame_cache, key, df, FRAME_CACHE_SIZE)
+    return ".".join(key), df
+
+
+def store_dataset(dataset_id: str, df: pd.DataFrame) -> bool:
+    """
+    Keep an ingested frame for load_dataset. Returns whether it also has a
+    Feather copy, which lets the dataset_id outlive a restart.
+    """
+    key = tuple(DATASET_ID_RE.fullmatch(dataset_id).group(1, 2))
+    cache_put(_datasets, key, df, DATASET_CACHE_SIZE)
+    cached_path = feather_cache_path(*key)
+    return bool(cached_path and os.path.exists(cached_path))
+
+
+async def load_dataset(dataset_id: str, numeric_only: bool = False) -> pd.DataFrame:
+    """
+    Load a frame stored by /ingest from memory or its Feather copy.
+    With numeric_only, a Feather copy is read for its numeric columns only.
+    """
+    match = DATASET_ID_RE.fullmatch(dataset_id)
+    if match:
+        key = match.group(1, 2)
+        for cache in (_datasets, _frame_cache):
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+
+        cached_path = feather_cache_path(*key)
+        if cached_path:
+            loop = asyncio.get_running_loop()
+            try:
+                os.utime(cached_path)
+                df = await loop.run_in_executor(None, read_feather, cached_path, numeric_only)
+            except FileNotFoundError:
+                pass  # never written, or pruned
+            else:
+                if not numeric_only:
+                    cache_put(_frame_cache, key, df, FRAME_CACHE_SIZE)
+                return df
+
+    raise HTTPException(
+        status_code=404,
+        detail=f"Unknown or expired dataset_id '{dataset_id}'. Please ingest the file again.",
+    )
+
+
+async def load_frame(
+    file: Optional[UploadFile], dataset_id: Optional[str], numeric_only: bool = False
+) -> pd.DataFrame:
+    """Frame for an analysis request, from either an uploaded file or an ingested dataset_id."""
+    if dataset_id is not None:
+        return await load_dataset(dataset_id, numeric_only)
+    if file is None:
+        raise HTTPException(status_code=400, detail="Provide either a file or a dataset_id.")
+
+    extension = (file.filename or "").split(".")[-1].lower()
+    try:
+        return await read_upload(file, extension)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def parse_data_path(path: str, extension: str, feather_path: Optional[str] = None) -> pd.DataFrame:
+    """Parse a data file on disk, optionally saving it as Feather. Runs in a PROCESS_POOL worker."""
+    with open(path, "rb") as source:
+        df = read_data_file(source, extension)
+    if SHRINK_DTYPES:
+        df = shrink_dtypes(df)
+    if feather_path:
+        write_feather(df, feather_path)
+    return df
+
+
+def feather_cache_path(digest: str, extension: str) -> Optional[str]:
+    """Location of the Feather copy of a parsed upload, or None when the cache is disabled."""
+    if not FEATHER_CACHE_ENABLED:
+        return None
+    # Frames are cached per parsing setup, so toggling SHRINK_DTYPES or FAST_IO
+    # never serves a frame with the other precision or CSV engine's dtypes
+    suffix = ".f32" if SHRINK_DTYPES else ""
+    if extension == "csv" and not FAST_IO:
+        suffix += ".c"
+    return os.path.join(FEATHER_CACHE_DIR, f"{digest}.{extension}{suffix}.feather")
+
+
+def write_feather(df: pd.DataFrame, path: str) -> None:
+    """Save a parsed frame as Feather v2, skipping frames that don't round-trip exactly."""
+    import pyarrow as pa
+    from pyarrow import feather
+
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df)
+        # Mixed-type object columns come back with an inferred Arrow type. The
+        # reloaded dtypes follow from the schema alone, so an empty slice shows them.
+        if not table.slice(0, 0).to_pandas().dtypes.equals(df.dtypes):
+            raise ValueError("column dtypes change on reload")
+        feather.write_feather(table, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Could not cache frame as Feather: {e}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def read_feather(path: str, numeric_only: bool = False) -> pd.DataFrame:
+    """Load a cached Feather frame through a memory map, optionally just its numeric columns."""
+    import pyarrow as pa
+    from pyarrow import feather
+
+    table = feather.read_table(path, memory_map=True)
+    if numeric_only:
+        table = table.select([
+            i for i, field in enumerate(table.schema)
+            if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+        ])
+    return table.to_pandas(self_destruct=True)
+
+
+def prune_feather_cache() -> None:
+    """
+    Delete all but the FEATHER_CACHE_SIZE most recently used Feather files, and
+    partial writes abandoned by workers killed mid-write. Other server processes
+    may be pruning the same directory, so files can vanish at any point.
+    """
+    now = time.time()
+    cached = []
+    stale = []
+    try:
+        with os.scandir(FEATHER_CACHE_DIR) as entries:
+            for entry in entries:
+                try:
+                    mtime = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(".feather"):
+                    cached.append((mtime, entry.path))
+                elif entry.name.endswith(".tmp") and now - mtime > FEATHER_TMP_MAX_AGE:
+                    stale.append(entry.path)
+    except FileNotFoundError:
+        return
+
+    cached.sort(reverse=True)
+    stale.extend(path for _, path in cached[FEATHER_CACHE_SIZE:])
+    for path in stale:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def shrink_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast float64 columns to float32 and int64 columns to the smallest integer type that fits."""
+    float_cols = df.select_dtypes(include=["float64"]).columns
+    if len(float_cols):
+        df[float_cols] = df[float_cols].astype(np.float32)
+    for col in df.select_dtypes(include=["int64"]).columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
 
 # Response models
 class VariableStats(BaseModel):
@@ -54,6 +365,15 @@ class FileSummary(BaseModel):
     file_type: str
 
 
+class ConversionResult(BaseModel):
+    dataset_id: str
+    persisted: bool
+    filename: str
+    file_type: str
+    rows: int
+    columns: int
+
+
 class AnalysisResult(BaseModel):
     type: str
     summary: str
@@ -135,10 +455,11 @@ async def upload_file(file: UploadFile = File(...)):
 
     filename = file.filename or "uploaded_file"
     extension = filename.split(".")[-1].lower()
-    content = await file.read()
 
     try:
-        df = read_data_file(content, extension)
+        df = await read_upload(file, extension)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -147,51 +468,147 @@ async def upload_file(file: UploadFile = File(...)):
             detail=f"Failed to parse file: {str(e)}. Please check the file format.",
         )
 
-    # Generate variable summaries
+    # Generate variable summaries from whole-frame aggregates computed once
+    is_numeric = df.dtypes.map(pd.api.types.is_numeric_dtype).to_numpy(dtype=bool)
+    numeric_stats = (
+        df.loc[:, is_numeric].agg(["mean", "std", "min", "max", "median"]).to_dict()
+        if is_numeric.any() else {}
+    )
+    unique_counts = df.loc[:, ~is_numeric].nunique()
+    n_rows = len(df)
+    counts = df.count()
+    missing = n_rows - counts
+    dtypes = df.dtypes
+
+    # The values are built and typed here, so the models skip validation. Nothing
+    # checks them later (FastAPI doesn't revalidate returned model instances), so
+    # every field must be cast to its declared type.
     variables = []
     for col in df.columns:
-        series = df[col]
-        var_stats = VariableStats(
-            name=str(col),
-            dtype=str(series.dtype),
-            count=int(series.count()),
-            missing=int(series.isna().sum()),
-        )
-
-        if pd.api.types.is_numeric_dtype(series):
-            var_stats.mean = float(series.mean()) if not series.isna().all() else None
-            var_stats.std = float(series.std()) if not series.isna().all() else None
-            var_stats.min = float(series.min()) if not series.isna().all() else None
-            var_stats.max = float(series.max()) if not series.isna().all() else None
-            var_stats.median = float(series.median()) if not series.isna().all() else None
+        var_stats = {
+            "name": str(col),
+            "dtype": str(dtypes[col]),
+            "count": int(counts[col]),
+            "missing": int(missing[col]),
+        }
+
+        if col in numeric_stats:
+            if counts[col] > 0:
+                col_stats = numeric_stats[col]
+                var_stats["mean"] = float(col_stats["mean"])
+                var_stats["std"] = float(col_stats["std"])
+                var_stats["min"] = float(col_stats["min"])
+                var_stats["max"] = float(col_stats["max"])
+                var_stats["median"] = float(col_stats["median"])
         else:
-            var_stats.unique = int(series.nunique())
+            var_stats["unique"] = int(unique_counts[col])
 
-        variables.append(var_stats)
+        variables.append(VariableStats.model_construct(**var_stats))
 
-    return FileSummary(
+    return FileSummary.model_construct(
         filename=filename,
-        rows=len(df),
+        rows=n_rows,
         columns=len(df.columns),
         variables=variables,
         file_type=extension,
     )
 
 
-def read_data_file(content: bytes, extension: str) -> pd.DataFrame:
-    """Read a data file and return a pandas DataFrame."""
-    buffer = BytesIO(content)
+# Format conversion
+@app.post("/ingest", response_model=ConversionResult)
+@app.post("/convert", response_model=ConversionResult)
+async def convert_file(file: UploadFile = File(...)):
+    """
+    Parse a data file once and cache it as Feather, so later analyses of the
+    same file load the columnar copy instead of re-parsing it. The returned
+    dataset_id can be passed to /analyze/* in place of the file. persisted is
+    false when the frame couldn't be saved as Feather, so the id only lasts
+    while the frame stays in memory.
+    """
+    if file.size > 10 * 1024 * 1024:  # 10MB limit
+        raise HTTPException(
+            status_code=413,
+            detail="File size exceeds 10MB limit. Consider sampling or splitting your data.",
+        )
+
+    filename = file.filename or "uploaded_file"
+    extension = filename.split(".")[-1].lower()
+
+    try:
+        dataset_id, df = await ingest_upload(file, extension)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Failed to parse file: {str(e)}. Please check the file format.",
+        )
+
+    return ConversionResult(
+        dataset_id=dataset_id,
+        persisted=store_dataset(dataset_id, df),
+        filename=filename,
+        file_type=extension,
+        rows=len(df),
+        columns=len(df.columns),
+    )
+
 
+def matches_default_csv_engine(df: pd.DataFrame) -> bool:
+    """
+    Whether a frame read with the pyarrow CSV engine has the columns and dtypes
+    the default engine gives. pyarrow keeps duplicate header names (the default
+    engine renames them "x", "x.1"), types header-only columns as float64,
+    parses date/time text into datetime, date and time values, and reads
+    integers written as "+1" or too large for int64 as float64 (the default
+    engine gives int64, uint64 or text). Hex literals
+    such as "0x10" are the one known difference this can't detect: pyarrow
+    reads them as integers where the default engine keeps the text.
+    """
+    if not df.columns.is_unique or not len(df):
+        return False
+    for col, dtype in df.dtypes.items():
+        # date/time columns come back as datetime64 or as object columns of date/time values
+        if dtype.kind in "Mm" or (isinstance(dtype, np.dtype) and dtype.kind == "O"):
+            return False
+        if dtype.kind == "f":
+            values = df[col].to_numpy()
+            observed = values[~np.isnan(values)]
+            if observed.size and np.abs(observed).max() >= 2**63:
+                return False
+            if observed.size == values.size and np.array_equal(observed, np.trunc(observed)):
+                return False
+    return True
+
+
+def _spill_to_path(source: BinaryIO, suffix: str) -> str:
+    """Copy a file-like object to a named temp file for readers that need a path."""
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False, mode='wb') as tmp:
+        shutil.copyfileobj(source, tmp)
+        return tmp.name
+
+
+def read_data_file(source: BinaryIO, extension: str) -> pd.DataFrame:
+    """Read a data file from a file-like object and return a pandas DataFrame."""
     if extension in ["csv"]:
-        return pd.read_csv(buffer)
+        if FAST_IO and HAS_PYARROW:
+            try:
+                df = pd.read_csv(source, engine="pyarrow")
+                if matches_default_csv_engine(df):
+                    return df
+            except Exception as e:
+                # pyarrow rejects some files the default parser accepts
+                print(f"pyarrow CSV parse failed, falling back to default engine: {e}")
+            source.seek(0)
+        return pd.read_csv(source)
     elif extension in ["xlsx", "xls"]:
-        return pd.read_excel(buffer)
+        return pd.read_excel(source)
     elif extension in ["dta"]:
         import pyreadstat
-        # pyreadstat requires a file path, not BytesIO
-        with tempfile.NamedTemporaryFile(suffix='.dta', delete=False) as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        # pyreadstat requires a file path, not a file object
+        tmp_path = _spill_to_path(source, '.dta')
         try:
             df, meta = pyreadstat.read_dta(tmp_path)
             return df
@@ -199,14 +616,10 @@ def read_data_file(content: bytes, extension: str) -> pd.DataFrame:
             os.unlink(tmp_path)
     elif extension in ["sav"]:
         import pyreadstat
-        # pyreadstat requires a file path, not BytesIO
-        # Use mode='wb' explicitly for binary write
-        with tempfile.NamedTemporaryFile(suffix='.sav', delete=False, mode='wb') as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        # pyreadstat requires a file path, not a file object
+        tmp_path = _spill_to_path(source, '.sav')
         try:
-            print(f"SPSS file size: {len(content)} bytes, temp path: {tmp_path}")
-            print(f"First 20 bytes: {content[:20]}")
+            print(f"SPSS file size: {os.path.getsize(tmp_path)} bytes, temp path: {tmp_path}")
             # Try read_sav first (standard SPSS format)
             df, meta = pyreadstat.read_sav(tmp_path)
             return df
@@ -225,12 +638,9 @@ def read_data_file(content: bytes, extension: str) -> pd.DataFrame:
     elif extension in ["rds"]:
         import rdata
         import warnings
-        # rdata requires a file path, not BytesIO
-        print(f"RDS file size: {len(content)} bytes")
-        print(f"First 20 bytes: {content[:20]}")
-        with tempfile.NamedTemporaryFile(suffix='.rds', delete=False, mode='wb') as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        # rdata requires a file path, not a file object
+        tmp_path = _spill_to_path(source, '.rds')
+        print(f"RDS file size: {os.path.getsize(tmp_path)} bytes")
         try:
             parsed = rdata.parser.parse_file(tmp_path)
             # Suppress encoding warnings and use default_encoding to handle non-ASCII data
@@ -259,10 +669,8 @@ def read_data_file(content: bytes, extension: str) -> pd.DataFrame:
                 os.unlink(tmp_path)
     elif extension in ["rda", "rdata"]:
         import rdata
-        # rdata requires a file path, not BytesIO
-        with tempfile.NamedTemporaryFile(suffix=f'.{extension}', delete=False) as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        # rdata requires a file path, not a file object
+        tmp_path = _spill_to_path(source, f'.{extension}')
         try:
             parsed = rdata.parser.parse_file(tmp_path)
             converted = rdata.conversion.convert(parsed)
@@ -284,17 +692,44 @@ def read_data_file(content: bytes, extension: str) -> pd.DataFrame:
         raise ValueError(f"Unsupported file format: {extension}")
 
 
+def describe_numeric(df: pd.DataFrame, numeric_cols: list) -> dict:
+    """
+    Summarize numeric columns in the same layout as DataFrame.describe(),
+    computing each statistic for all columns at once on a float matrix.
+    """
+    import warnings
+
+    if df.empty:
+        # numpy quantiles reject zero-length axes
+        return df[numeric_cols].describe().to_dict()
+
+    values = df[numeric_cols].to_numpy(dtype=STATS_DTYPE, na_value=np.nan)
+    with warnings.catch_warnings():
+        # All-missing columns yield NaN statistics, as describe() does
+        warnings.simplefilter("ignore", RuntimeWarning)
+        q25, q50, q75 = np.nanpercentile(values, [25, 50, 75], axis=0)
+        columns_stats = {
+            "count": (~np.isnan(values)).sum(axis=0),
+            "mean": np.nanmean(values, axis=0),
+            "std": np.nanstd(values, axis=0, ddof=1),
+            "min": np.nanmin(values, axis=0),
+            "25%": q25,
+            "50%": q50,
+            "75%": q75,
+            "max": np.nanmax(values, axis=0),
+        }
+
+    return {
+        col: {stat: float(column_values[j]) for stat, column_values in columns_stats.items()}
+        for j, col in enumerate(numeric_cols)
+    }
+
+
 # Descriptive analysis
 @app.post("/analyze/descriptive", response_model=AnalysisResult)
-async def analyze_descriptive(file: UploadFile = File(...)):
-    """Run descriptive statistics on uploaded data."""
-    content = await file.read()
-    extension = (file.filename or "").split(".")[-1].lower()
-
-    try:
-        df = read_data_file(content, extension)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+async def analyze_descriptive(file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = None):
+    """Run descriptive statistics on uploaded or ingested data."""
+    df = await load_frame(file, dataset_id)
 
     # Get numeric columns
     numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
@@ -308,22 +743,23 @@ async def analyze_descriptive(file: UploadFile = File(...)):
         )
 
     # Calculate statistics
-    stats = df[numeric_cols].describe().to_dict()
+    n_rows = len(df)
+    stats = describe_numeric(df, numeric_cols)
 
     # Check for potential issues
     warnings = []
 
     # Check for small sample size
-    if len(df) < 30:
+    if n_rows < 30:
         warnings.append({
             "type": "sample_size",
-            "message": f"Small sample size (n={len(df)}). Results may not be generalizable.",
+            "message": f"Small sample size (n={n_rows}). Results may not be generalizable.",
             "severity": "high",
         })
 
-    # Check for high missing data
+    # Check for high missing data, reusing the non-missing counts from above
     for col in numeric_cols:
-        missing_pct = df[col].isna().sum() / len(df) * 100
+        missing_pct = (n_rows - stats[col]["count"]) / n_rows * 100 if n_rows else 0.0
         if missing_pct > 20:
             warnings.append({
                 "type": "missing_data",
@@ -333,48 +769,76 @@ async def analyze_descriptive(file: UploadFile = File(...)):
 
     return AnalysisResult(
         type="descriptive",
-        summary=f"Analyzed {len(numeric_cols)} numeric variables across {len(df)} observations.",
-        details={"statistics": stats, "sample_size": len(df)},
+        summary=f"Analyzed {len(numeric_cols)} numeric variables across {n_rows} observations.",
+        details={"statistics": stats, "sample_size": n_rows},
         rigor_warnings=warnings,
     )
 
 
+def iqr_outliers(values: np.ndarray, observed: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lower/upper IQR fences (1.5 x IQR) and outlier counts of each column,
+    ignoring NaN, with quartiles interpolated like np.nanquantile. Each column
+    only needs four order statistics, which np.partition selects in O(N); NaNs
+    partition past the last of them. Outliers can only lie below the first
+    or above the last of those, so counting scans just the partitioned tails.
+    """
+    positions = np.outer([0.25, 0.75], observed - 1)
+    lows = np.floor(positions).astype(np.intp)
+    highs = np.ceil(positions).astype(np.intp)
+    weights = positions - lows
+    lower_bounds = np.empty(values.shape[1])
+    upper_bounds = np.empty(values.shape[1])
+    outlier_counts = np.empty(values.shape[1], dtype=np.intp)
+    for j in range(values.shape[1]):
+        ordered = np.partition(values[:, j], [lows[0, j], highs[0, j], lows[1, j], highs[1, j]])
+
+        # Same two-sided interpolation as numpy's quantile, for identical results
+        below = ordered[lows[:, j]]
+        above = ordered[highs[:, j]]
+        weight = weights[:, j]
+        diff = above - below
+        q1, q3 = np.where(weight >= 0.5, above - diff * (1 - weight), below + diff * weight)
+
+        iqr = q3 - q1
+        lower_bounds[j] = q1 - 1.5 * iqr
+        upper_bounds[j] = q3 + 1.5 * iqr
+        outlier_counts[j] = (
+            np.count_nonzero(ordered[:highs[0, j]] < lower_bounds[j])
+            + np.count_nonzero(ordered[lows[1, j] + 1:] > upper_bounds[j])
+        )
+    return lower_bounds, upper_bounds, outlier_counts
+
+
 # Anomaly detection
 @app.post("/analyze/anomaly", response_model=AnalysisResult)
-async def analyze_anomalies(file: UploadFile = File(...)):
-    """Detect statistical anomalies and outliers in the data."""
-    content = await file.read()
-    extension = (file.filename or "").split(".")[-1].lower()
-
-    try:
-        df = read_data_file(content, extension)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+async def analyze_anomalies(file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = None):
+    """Detect statistical anomalies and outliers in uploaded or ingested data."""
+    df = await load_frame(file, dataset_id, numeric_only=True)
 
     numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
     anomalies = []
     warnings = []
 
-    for col in numeric_cols:
-        series = df[col].dropna()
-        if len(series) < 10:
-            continue
-
-        # IQR-based outlier detection
-        q1, q3 = series.quantile([0.25, 0.75])
-        iqr = q3 - q1
-        lower_bound = q1 - 1.5 * iqr
-        upper_bound = q3 + 1.5 * iqr
-
-        outliers = series[(series < lower_bound) | (series > upper_bound)]
-        if len(outliers) > 0:
-            anomalies.append({
-                "variable": col,
-                "outlier_count": len(outliers),
-                "outlier_percentage": len(outliers) / len(series) * 100,
-                "lower_bound": float(lower_bound),
-                "upper_bound": float(upper_bound),
-            })
+    # IQR-based outlier detection over all numeric columns at once,
+    # skipping columns with fewer than 10 observed values
+    values = df[numeric_cols].to_numpy(dtype=STATS_DTYPE, na_value=np.nan)
+    observed = (~np.isnan(values)).sum(axis=0)
+    checked = np.flatnonzero(observed >= 10)
+    if checked.size:
+        values = values[:, checked]
+
+        lower_bounds, upper_bounds, outlier_counts = iqr_outliers(values, observed[checked])
+
+        for k, j in enumerate(checked):
+            if outlier_counts[k] > 0:
+                anomalies.append({
+                    "variable": numeric_cols[j],
+                    "outlier_count": int(outlier_counts[k]),
+                    "outlier_percentage": float(outlier_counts[k] / observed[j] * 100),
+                    "lower_bound": float(lower_bounds[k]),
+                    "upper_bound": float(upper_bounds[k]),
+                })
 
     # Add multiple testing warning if checking many variables
     if len(numeric_cols) > 5:
@@ -403,17 +867,37 @@ async def analyze_anomalies(file: UploadFile = File(...)):
     )
 
 
+def correlation_matrix(df: pd.DataFrame, numeric_cols: list) -> np.ndarray:
+    """
+    Pearson correlation matrix of the numeric columns. Without missing values
+    this is a single matrix product of the standardized data; otherwise
+    pandas handles the pairwise deletion.
+    """
+    import warnings
+
+    values = df[numeric_cols].to_numpy(dtype=STATS_DTYPE, na_value=np.nan)
+    if len(values) < 2 or np.isnan(values).any():
+        return df[numeric_cols].corr().to_numpy()
+
+    with warnings.catch_warnings():
+        # Constant columns have zero variance and get NaN, as with DataFrame.corr()
+        warnings.simplefilter("ignore", RuntimeWarning)
+        values = values - values.mean(axis=0)
+        values /= values.std(axis=0, ddof=1)
+        corr = (values.T @ values) / (len(values) - 1)
+    return np.clip(corr, -1, 1)
+
+
 # Correlation analysis
 @app.post("/analyze/correlation", response_model=AnalysisResult)
-async def analyze_correlations(file: UploadFile = File(...)):
-    """Analyze correlations between numeric variables."""
-    content = await file.read()
-    extension = (file.filename or "").split(".")[-1].lower()
-
-    try:
-        df = read_data_file(content, extension)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+async def analyze_correlations(
+    file: Optional[UploadFile] = File(None), dataset_id: Optional[str] = None, include_matrix: bool = False
+):
+    """
+    Analyze correlations between numeric variables of uploaded or ingested data.
+    The full correlation matrix is only returned when include_matrix is set.
+    """
+    df = await load_frame(file, dataset_id, numeric_only=True)
 
     numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
 
@@ -426,19 +910,20 @@ async def analyze_correlations(file: UploadFile = File(...)):
         )
 
     # Calculate correlation matrix
-    corr_matrix = df[numeric_cols].corr()
-
-    # Find strong correlations
-    strong_correlations = []
-    for i, col1 in enumerate(numeric_cols):
-        for col2 in numeric_cols[i + 1:]:
-            corr = corr_matrix.loc[col1, col2]
-            if abs(corr) > 0.5 and not np.isnan(corr):
-                strong_correlations.append({
-                    "var1": col1,
-                    "var2": col2,
-                    "correlation": float(corr),
-                })
+    corr_matrix = correlation_matrix(df, numeric_cols)
+
+    # Find strong correlations in the upper triangle of the matrix
+    rows, cols = np.triu_indices(len(numeric_cols), k=1)
+    pair_corrs = corr_matrix[rows, cols]
+    strong = np.abs(pair_corrs) > 0.5
+    strong_correlations = [
+        {
+            "var1": numeric_cols[i],
+            "var2": numeric_cols[j],
+            "correlation": corr,
+        }
+        for i, j, corr in zip(rows[strong].tolist(), cols[strong].tolist(), pair_corrs[strong].tolist())
+    ]
 
     warnings = []
 
@@ -457,19 +942,84 @@ async def analyze_correlations(file: UploadFile = File(...)):
     else:
         summary += "No strong correlations (|r| > 0.5) detected."
 
+    details = {
+        "strong_correlations": sorted(
+            strong_correlations, key=lambda x: abs(x["correlation"]), reverse=True
+        ),
+    }
+    if include_matrix:
+        details["correlation_matrix"] = {
+            "columns": numeric_cols,
+            "matrix": corr_matrix.round(6).tolist(),
+        }
+
     return AnalysisResult(
         type="correlation",
         summary=summary,
-        details={
-            "correlation_matrix": corr_matrix.to_dict(),
-            "strong_correlations": sorted(
-                strong_correlations, key=lambda x: abs(x["correlation"]), reverse=True
-            ),
-        },
+        details=details,
         rigor_warnings=warnings,
     )
 
 
+# Common themes to look for in organizational research
+THEME_PATTERNS = {
+    "communication": r"\b(communication|communicat\w*|messag\w*|email\w*|meeting\w*|inform\w*)\b",
+    "leadership": r"\b(leader\w*|management|manager\w*|director\w*|executive\w*|decision\w*)\b",
+    "trust": r"\b(trust\w*|distrust\w*|psycholog\w*\s*safety|safe\w*|vulnerab\w*)\b",
+    "conflict": r"\b(conflict\w*|friction|tension\w*|disagree\w*|dispute\w*)\b",
+    "teamwork": r"\b(team\w*|collaborat\w*|cooperat\w*|together\w*|group\w*)\b",
+    "deadlines": r"\b(deadline\w*|timeline\w*|schedule\w*|deliver\w*|due\s*date\w*|miss\w*)\b",
+    "roles": r"\b(role\w*|responsib\w*|accountab\w*|clarif\w*|unclear\w*)\b",
+    "silos": r"\b(silo\w*|department\w*|cross.?functional\w*|coordinat\w*)\b",
+    "culture": r"\b(cultur\w*|norm\w*|value\w*|climate\w*|environment\w*)\b",
+    "performance": r"\b(perform\w*|productiv\w*|efficien\w*|effectiv\w*|outcome\w*)\b",
+}
+
+# All themes combined into one alternation with a named group per theme
+THEME_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in THEME_PATTERNS.items()))
+WORD_RE = re.compile(r"\b[a-z]{4,}\b")
+
+# Common stop words left out of the most-common-words list
+STOP_WORDS = frozenset({"that", "this", "with", "from", "have", "were", "been", "they", "their", "about", "would", "could", "should", "which", "there", "being", "because", "didn", "wasn", "doesn", "people"})
+
+# Aho-Corasick automaton over the literal stem of every theme alternative
+# (pyahocorasick, optional). It finds candidate match positions in one pass;
+# THEME_RE confirms each one, so results are the same as with the regex alone.
+try:
+    import ahocorasick
+
+    THEME_AUTOMATON = ahocorasick.Automaton()
+    for pattern in THEME_PATTERNS.values():
+        for alternative in pattern[len(r"\b("):-len(r")\b")].split("|"):
+            stem = re.match(r"[a-z]+", alternative).group(0)
+            THEME_AUTOMATON.add_word(stem, len(stem))
+    THEME_AUTOMATON.make_automaton()
+except ImportError:
+    THEME_AUTOMATON = None
+
+
+def iter_theme_matches(text_lower: str):
+    """Yield THEME_RE matches in text order, prefiltered by THEME_AUTOMATON when available."""
+    if THEME_AUTOMATON is None:
+        yield from THEME_RE.finditer(text_lower)
+        return
+
+    starts = sorted({end - length + 1 for end, length in THEME_AUTOMATON.iter(text_lower)})
+    next_start = 0
+    for start in starts:
+        if start < next_start:
+            continue
+        match = THEME_RE.match(text_lower, start)
+        if match:
+            yield match
+            next_start = match.end()
+
+
+def count_segments(text: str) -> int:
+    """Count the non-blank segments of text separated by blank lines."""
+    return len(list(filter(str.strip, text.split("\n\n"))))
+
+
 # Theme analysis for qualitative data
 @app.post("/analyze/theme", response_model=AnalysisResult)
 async def analyze_themes(file: UploadFile = File(...)):
@@ -483,28 +1033,15 @@ async def analyze_themes(file: UploadFile = File(...)):
 
     # Simple theme extraction using word frequency analysis
     # In production, this could use NLP libraries like spaCy or NLTK
-    import re
-    from collections import Counter
-
-    # Define common themes to look for in organizational research
-    theme_patterns = {
-        "communication": r"\b(communication|communicat\w*|messag\w*|email\w*|meeting\w*|inform\w*)\b",
-        "leadership": r"\b(leader\w*|management|manager\w*|director\w*|executive\w*|decision\w*)\b",
-        "trust": r"\b(trust\w*|distrust\w*|psycholog\w*\s*safety|safe\w*|vulnerab\w*)\b",
-        "conflict": r"\b(conflict\w*|friction|tension\w*|disagree\w*|dispute\w*)\b",
-        "teamwork": r"\b(team\w*|collaborat\w*|cooperat\w*|together\w*|group\w*)\b",
-        "deadlines": r"\b(deadline\w*|timeline\w*|schedule\w*|deliver\w*|due\s*date\w*|miss\w*)\b",
-        "roles": r"\b(role\w*|responsib\w*|accountab\w*|clarif\w*|unclear\w*)\b",
-        "silos": r"\b(silo\w*|department\w*|cross.?functional\w*|coordinat\w*)\b",
-        "culture": r"\b(cultur\w*|norm\w*|value\w*|climate\w*|environment\w*)\b",
-        "performance": r"\b(perform\w*|productiv\w*|efficien\w*|effectiv\w*|outcome\w*)\b",
-    }
-
     text_lower = text.lower()
-    themes = []
 
-    for theme_name, pattern in theme_patterns.items():
-        matches = re.findall(pattern, text_lower)
+    # Single pass over the text; each match is tagged with its theme group
+    theme_matches = {theme_name: [] for theme_name in THEME_PATTERNS}
+    for match in iter_theme_matches(text_lower):
+        theme_matches[match.lastgroup].append(match.group(match.lastgroup))
+
+    themes = []
+    for theme_name, matches in theme_matches.items():
         if matches:
             themes.append({
                 "theme": theme_name,
@@ -515,12 +1052,13 @@ async def analyze_themes(file: UploadFile = File(...)):
     # Sort by frequency
     themes = sorted(themes, key=lambda x: x["frequency"], reverse=True)
 
-    # Also extract the most common words for additional context
-    words = re.findall(r"\b[a-z]{4,}\b", text_lower)
-    # Filter out common stop words
-    stop_words = {"that", "this", "with", "from", "have", "were", "been", "they", "their", "about", "would", "could", "should", "which", "there", "being", "because", "didn", "wasn", "doesn", "people"}
-    words = [w for w in words if w not in stop_words]
-    word_counts = Counter(words).most_common(20)
+    # Also extract the most common words for additional context,
+    # counting tokens as they are matched and skipping stop words
+    word_counter = Counter()
+    word_counter.update(
+        word for word in map(itemgetter(0), WORD_RE.finditer(text_lower)) if word not in STOP_WORDS
+    )
+    word_counts = word_counter.most_common(20)
 
     warnings = []
 
@@ -532,13 +1070,12 @@ async def analyze_themes(file: UploadFile = File(...)):
     })
 
     # Count approximate entries/segments
-    segments = text.split("\n\n")
-    segments = [s for s in segments if s.strip()]
+    segment_count = count_segments(text)
 
-    if len(segments) < 5:
+    if segment_count < 5:
         warnings.append({
             "type": "sample_size",
-            "message": f"Only {len(segments)} text segments found. Consider whether this represents adequate data saturation.",
+            "message": f"Only {segment_count} text segments found. Consider whether this represents adequate data saturation.",
             "severity": "medium",
         })
 
@@ -546,7 +1083,7 @@ async def analyze_themes(file: UploadFile = File(...)):
         summary = "No common themes detected. The text may not contain organizational research-related content."
     else:
         top_themes = [t["theme"] for t in themes[:3]]
-        summary = f"Identified {len(themes)} recurring themes across {len(segments)} text segments. Top themes: {', '.join(top_themes)}."
+        summary = f"Identified {len(themes)} recurring themes across {segment_count} text segments. Top themes: {', '.join(top_themes)}."
 
     return AnalysisResult(
         type="theme",
@@ -554,7 +1091,7 @@ async def analyze_themes(file: UploadFile = File(...)):
         details={
             "themes": themes,
             "common_words": [{"word": w, "count": c} for w, c in word_counts],
-            "segment_count": len(segments),
+            "segment_count": segment_count,
         },
         rigor_warnings=warnings,
     )
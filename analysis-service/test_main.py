@@ -0,0 +1,163 @@
+"""
+Tests for the analysis service's vectorized helpers and CSV parsing.
+
+The helpers reimplement pandas/numpy/regex behaviour for speed, so each one
+is checked against the straightforward version it replaced.
+"""
+
+import os
+import random
+import tempfile
+
+# Keep parsed-frame Feather files out of the shared cache directory
+os.environ.setdefault("FEATHER_CACHE_DIR", tempfile.mkdtemp(prefix="scholarly-ideas-test-"))
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "test-data")
+
+client = TestClient(main.app)
+
+
+def upload(endpoint: str, filename: str):
+    with open(os.path.join(TEST_DATA_DIR, filename), "rb") as f:
+        return client.post(endpoint, files={"file": (filename, f)})
+
+
+# IQR outliers
+@pytest.mark.parametrize("seed", range(200))
+def test_iqr_outliers_matches_series_quantile(seed):
+    rng = np.random.default_rng(seed)
+    n_rows = int(rng.integers(10, 120))
+    values = rng.standard_t(2, size=(n_rows, 4)) * 10.0 ** rng.integers(-3, 6, size=4)
+    if seed % 3 == 0:
+        values = np.round(values)  # many ties
+    values[rng.random(values.shape) < 0.3] = np.nan
+    observed = (~np.isnan(values)).sum(axis=0)
+    keep = observed >= 10
+    values, observed = values[:, keep], observed[keep]
+
+    lower_bounds, upper_bounds, outlier_counts = main.iqr_outliers(values, observed)
+
+    for j in range(values.shape[1]):
+        series = pd.Series(values[:, j]).dropna()
+        q1, q3 = series.quantile([0.25, 0.75])
+        iqr = q3 - q1
+        assert lower_bounds[j] == q1 - 1.5 * iqr
+        assert upper_bounds[j] == q3 + 1.5 * iqr
+        assert outlier_counts[j] == ((series < lower_bounds[j]) | (series > upper_bounds[j])).sum()
+
+
+def test_iqr_outliers_float32_matches_mask_count():
+    rng = np.random.default_rng(0)
+    values = (rng.standard_t(2, size=(500, 6)) * 100).astype(np.float32)
+    values[rng.random(values.shape) < 0.2] = np.nan
+    observed = (~np.isnan(values)).sum(axis=0)
+
+    lower_bounds, upper_bounds, outlier_counts = main.iqr_outliers(values, observed)
+
+    mask = (values < lower_bounds) | (values > upper_bounds)
+    np.testing.assert_array_equal(outlier_counts, mask.sum(axis=0))
+
+
+# Theme matching
+THEME_WORDS = [
+    "communication", "messages", "meeting", "leader", "managers", "trust", "psychological safety",
+    "conflict", "tension", "teamwork", "collaborate", "deadline", "due date", "missed", "roles",
+    "unclear", "silos", "cross-functional", "culture", "norms", "performance", "outcomes",
+    "teammate", "informal", "misstep", "together", "environmental",
+]
+FILLER_WORDS = ["the", "we", "had", "a", "lot", "of", "and", "but", "team's", "re-", "x", "ab", ""]
+
+
+def theme_spans(matches):
+    return [(match.lastgroup, match.span()) for match in matches]
+
+
+@pytest.mark.parametrize("filename", ["test-interviews.txt", "test-qualitative.txt"])
+def test_iter_theme_matches_on_transcripts(filename):
+    with open(os.path.join(TEST_DATA_DIR, "..", filename), encoding="utf-8") as f:
+        text_lower = f.read().lower()
+    assert theme_spans(main.iter_theme_matches(text_lower)) == theme_spans(main.THEME_RE.finditer(text_lower))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_iter_theme_matches_on_random_text(seed):
+    rng = random.Random(seed)
+    words = [rng.choice(THEME_WORDS if rng.random() < 0.4 else FILLER_WORDS) for _ in range(rng.randint(0, 60))]
+    separators = [" ", "  ", "\n", "-", "", ".", ", "]
+    text_lower = "".join(word + rng.choice(separators) for word in words)
+    assert theme_spans(main.iter_theme_matches(text_lower)) == theme_spans(main.THEME_RE.finditer(text_lower))
+
+
+# Segment counting
+@pytest.mark.parametrize("text", [
+    "",
+    "one",
+    "one\n\ntwo",
+    "one\n\n\ntwo",
+    "one\n\n\n\ntwo\n\n\n\n\nthree",
+    "one\n\n",
+    "one\n\n  \n\n \t\n\n",
+    "\n\n\n\none",
+    "one\ntwo\n \nthree",
+    "  \n\n\t",
+])
+def test_count_segments_matches_split(text):
+    assert main.count_segments(text) == len([s for s in text.split("\n\n") if s.strip()])
+
+
+def test_count_segments_matches_split_on_random_text():
+    rng = random.Random(0)
+    for _ in range(500):
+        text = "".join(rng.choice(["a", "b c", " ", "\t", "\n", "\n\n", "\n\n\n"]) for _ in range(rng.randint(0, 40)))
+        assert main.count_segments(text) == len([s for s in text.split("\n\n") if s.strip()])
+
+
+# CSV parsing
+@pytest.mark.parametrize("filename", [
+    "duplicate-headers.csv",
+    "header-only.csv",
+    "date-time-columns.csv",
+    "integer-formats.csv",
+    "insurance.csv",
+    "known_stats.csv",
+])
+def test_read_data_file_matches_default_csv_engine(filename):
+    path = os.path.join(TEST_DATA_DIR, filename)
+    with open(path, "rb") as source:
+        df = main.read_data_file(source, "csv")
+    expected = pd.read_csv(path)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_upload_duplicate_headers():
+    response = upload("/upload", "duplicate-headers.csv")
+    assert response.status_code == 200
+    variables = {variable["name"]: variable for variable in response.json()["variables"]}
+    assert list(variables) == ["score", "score.1", "age"]
+    assert variables["score"]["mean"] == 3.5
+    assert variables["score.1"]["mean"] == 4.25
+
+
+def test_upload_header_only():
+    response = upload("/upload", "header-only.csv")
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["rows"] == 0
+    assert [variable["name"] for variable in summary["variables"]] == ["id", "name", "value"]
+    assert {variable["dtype"] for variable in summary["variables"]} == {"object"}
+
+
+def test_upload_keeps_date_and_large_integer_columns_as_text():
+    dates = {variable["name"]: variable for variable in upload("/upload", "date-time-columns.csv").json()["variables"]}
+    assert dates["timestamp"]["dtype"] == dates["date"]["dtype"] == dates["start_time"]["dtype"] == "str"
+
+    integers = {variable["name"]: variable for variable in upload("/upload", "integer-formats.csv").json()["variables"]}
+    assert integers["respondent_id"]["mean"] is None
+    assert integers["change"]["dtype"] == "int64"